@@ -26,6 +26,15 @@ def load_config(config_file="config.json"):
         "short_window": 20,
         "long_window": 60,
         "initial_capital": 100000,
+        "export_dir": "results",
+        "optimization": {
+            "stock_codes": [],              # 参与搜索的股票，为空时使用 stock_code
+            "short_windows": [5, 10, 15, 20, 30],
+            "long_windows": [40, 60, 90, 120, 250],
+            "eta": 3,                       # 每轮保留 1/eta 的候选参数
+            "resource": "dates",            # 逐轮增加的资源：dates 或 symbols
+            "max_drawdown_limit": None      # 最大回撤上限，超过则淘汰
+        },
         "trading_fees": {
             "commission_rate": 0.0003,      # 佣金率：万分之三
             "stamp_tax_rate": 0.001,        # 印花税率：千分之一
@@ -49,6 +58,10 @@ def load_config(config_file="config.json"):
         for key, default_value in default_config.items():
             if key not in config:
                 config[key] = default_value
+            elif isinstance(default_value, dict) and isinstance(config[key], dict):
+                # 嵌套配置（如 optimization）中缺失的键同样使用默认值
+                for sub_key, sub_default_value in default_value.items():
+                    config[key].setdefault(sub_key, sub_default_value)
                 
         return config
         
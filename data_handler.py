@@ -1,9 +1,26 @@
 import os
+from collections.abc import Iterator
 from datetime import datetime, timedelta
 
 import baostock as bs
 import polars as pl
 
+# baostock返回字段及其类型，字段顺序与查询字段一致
+STOCK_DATA_SCHEMA = {
+    "date": pl.String,
+    "code": pl.String,
+    "open": pl.Float64,
+    "high": pl.Float64,
+    "low": pl.Float64,
+    "close": pl.Float64,
+    "volume": pl.Float64,
+    "amount": pl.Float64,
+    "turn": pl.Float64
+}
+
+# 每个批次的最大行数
+BATCH_SIZE = 10_000
+
 
 def check_data_completeness(df: pl.DataFrame, start_date: str, end_date: str) -> tuple[bool, str]:
     """
@@ -87,50 +104,25 @@ def fetch_stock_data(stock_code: str, start_date: str, end_date: str) -> pl.Data
         # 获取数据
         rs = bs.query_history_k_data_plus(
             stock_code,
-            "date,code,open,high,low,close,volume,amount,turn",
+            ",".join(STOCK_DATA_SCHEMA),
             start_date=start_date,
             end_date=end_date,
             frequency="d",
             adjustflag="1"  # 复权类型，1：前复权
         )
         
-        # 转换为DataFrame
-        data_list = []
-        if rs is not None:
-            while (rs.error_code == '0') & rs.next():
-                data_list.append(rs.get_row_data())
-        
-        # 登出系统
-        bs.logout()
-        
-        # 创建DataFrame并处理数据类型
-        df = pl.DataFrame(
-            data_list,
-            schema={
-                "date": pl.String,
-                "code": pl.String,
-                "open": pl.Float64,
-                "high": pl.Float64,
-                "low": pl.Float64,
-                "close": pl.Float64,
-                "volume": pl.Float64,
-                "amount": pl.Float64,
-                "turn": pl.Float64
-            },
-            orient="row"  # 明确指定行方向
-        )
-        
-        # 转换日期格式并排序
-        df = df.with_columns([
-            pl.col("date").str.strptime(pl.Date, "%Y-%m-%d"),
-        ]).sort("date")
-        
         # 确保data目录存在
         os.makedirs("data", exist_ok=True)
         
-        # 保存数据到CSV文件
-        save_data_to_csv(df, csv_file)
-        print(f"数据已保存到 {csv_file}")
+        # 边接收边按批次写入CSV文件，内存占用与下载的数据量无关
+        try:
+            rows_written = stream_result_to_csv(rs, csv_file)
+        finally:
+            # 登出系统
+            bs.logout()
+        print(f"数据已保存到 {csv_file}，共 {rows_written} 条")
+        
+        df = load_data_from_csv(csv_file)
     
     # 检查数据完整性
     is_complete, message = check_data_completeness(df, start_date, end_date)
@@ -149,15 +141,92 @@ def fetch_stock_data(stock_code: str, start_date: str, end_date: str) -> pl.Data
     
     return df
 
-def save_data_to_csv(df: pl.DataFrame, filepath: str) -> None:
+def rows_to_batch(rows: list[list[str]]) -> pl.DataFrame:
+    """
+    将baostock返回的字符串行转换为带类型的DataFrame批次
+    
+    Args:
+        rows: baostock返回的行数据列表
+    
+    Returns:
+        polars.DataFrame: 转换类型后的批次数据
+    """
+    # 字符串列按schema转换类型（baostock缺失值为空字符串，无法解析时转换为null）
+    df = pl.DataFrame(
+        rows,
+        schema={name: pl.String for name in STOCK_DATA_SCHEMA},
+        orient="row"  # 明确指定行方向
+    )
+    return df.with_columns([
+        pl.col(name).cast(dtype, strict=False)
+        for name, dtype in STOCK_DATA_SCHEMA.items()
+        if dtype != pl.String
+    ] + [
+        pl.col("date").str.strptime(pl.Date, "%Y-%m-%d"),
+    ])
+
+def iter_result_batches(rs, batch_size: int = BATCH_SIZE) -> Iterator[pl.DataFrame]:
+    """
+    逐行读取baostock结果集，按固定大小产出带类型的批次
+    
+    Args:
+        rs: baostock查询返回的结果集
+        batch_size: 每个批次的最大行数
+    
+    Yields:
+        polars.DataFrame: 转换类型后的批次数据
+    """
+    rows = []
+    if rs is not None:
+        while (rs.error_code == '0') & rs.next():
+            rows.append(rs.get_row_data())
+            if len(rows) >= batch_size:
+                yield rows_to_batch(rows)
+                rows = []
+    
+    if rows:
+        yield rows_to_batch(rows)
+
+def stream_result_to_csv(rs, filepath: str, batch_size: int = BATCH_SIZE) -> int:
     """
-    将DataFrame保存为CSV文件
+    将baostock结果集按批次追加写入CSV文件
+    
+    先写入临时文件，全部写完后再替换目标文件，避免下载中断时留下不完整的缓存。
+    查询或分页请求失败时抛出ValueError，不会生成缓存文件。
     
     Args:
-        df: 要保存的DataFrame
+        rs: baostock查询返回的结果集
         filepath: 保存路径
+        batch_size: 每个批次的最大行数
+    
+    Returns:
+        int: 写入的总行数
     """
-    df.write_csv(filepath)
+    tmp_file = f"{filepath}.tmp"
+    rows_written = 0
+    try:
+        with open(tmp_file, "wb") as f:
+            for batch in iter_result_batches(rs, batch_size):
+                batch.write_csv(f, include_header=rows_written == 0)
+                rows_written += len(batch)
+            
+            # baostock分页请求失败时不会抛出异常，只会设置error_code并结束迭代
+            if rs is None or rs.error_code != '0':
+                error_msg = rs.error_msg if rs is not None else "查询未返回结果"
+                raise ValueError(f"下载失败: {error_msg}")
+            
+            # 没有数据时也写入表头，保证文件可以正常读取
+            if rows_written == 0:
+                rows_to_batch([]).write_csv(f)
+        
+        os.replace(tmp_file, filepath)
+    except BaseException:
+        # 下载失败时删除临时文件
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    
+    return rows_written
 
 def load_data_from_csv(filepath: str) -> pl.DataFrame:
     """
@@ -169,7 +238,8 @@ def load_data_from_csv(filepath: str) -> pl.DataFrame:
     Returns:
         polars.DataFrame: 加载的数据
     """
-    df = pl.read_csv(filepath)
+    # 按声明的类型读取，避免类型推断出错（如前若干行为空的列被推断为字符串）
+    df = pl.read_csv(filepath, schema=STOCK_DATA_SCHEMA)
     
     # 转换日期格式并排序
     df = df.with_columns([
@@ -0,0 +1,213 @@
+"""
+回测结果导出模块
+
+将多次回测的交易记录、每日资产和绩效指标缓冲后追加写入按 股票代码/批次 分区的Parquet数据集，
+并提供查询函数，便于跨回测分析时直接扫描整个数据集。
+
+数据集目录结构：
+    <root>/<table>/symbol=<股票代码>/batch=<批次>/part-<id>.parquet
+"""
+
+import os
+import uuid
+from datetime import datetime
+
+import polars as pl
+
+# 数据集中各表的列及类型（不含分区列），写入前统一转换，保证不同批次写入的文件类型一致
+TABLE_SCHEMAS = {
+    "trades": {
+        "date": pl.Date,
+        "type": pl.String,
+        "price": pl.Float64,
+        "shares": pl.Int64,
+        "value": pl.Float64,
+        "run_id": pl.String
+    },
+    "equity": {
+        "date": pl.Date,
+        "cash": pl.Float64,
+        "shares": pl.Int64,
+        "stock_value": pl.Float64,
+        "total_value": pl.Float64,
+        "run_id": pl.String
+    },
+    "metrics": {
+        "short_window": pl.Int64,
+        "long_window": pl.Int64,
+        "total_return": pl.Float64,
+        "annual_return": pl.Float64,
+        "sharpe_ratio": pl.Float64,
+        "max_drawdown": pl.Float64,
+        "run_id": pl.String
+    }
+}
+
+# 数据集中的表
+TABLES = tuple(TABLE_SCHEMAS)
+
+# 分区列
+PARTITION_SCHEMA = {
+    "symbol": pl.String,
+    "batch": pl.String
+}
+
+
+def conform_to_schema(df: pl.DataFrame, table: str) -> pl.DataFrame:
+    """
+    将DataFrame转换为表的固定列及类型，缺失的列填充null
+
+    Args:
+        df: 要转换的DataFrame
+        table: 表名
+
+    Returns:
+        polars.DataFrame: 列及类型与表一致的DataFrame
+    """
+    schema = {**TABLE_SCHEMAS[table], **PARTITION_SCHEMA}
+    unknown_columns = [name for name in df.columns if name not in schema]
+    if unknown_columns:
+        raise ValueError(f"表 {table} 中未定义的列: {', '.join(unknown_columns)}")
+
+    return df.select([
+        pl.col(name).cast(dtype) if name in df.columns else pl.lit(None, dtype=dtype).alias(name)
+        for name, dtype in schema.items()
+    ])
+
+
+class ResultExporter:
+    def __init__(self, root: str = "results", batch: str | None = None, buffer_rows: int = 100_000):
+        """
+        初始化导出器
+
+        Args:
+            root: 数据集根目录
+            batch: 批次标识，默认使用当前日期
+            buffer_rows: 缓冲区累计行数达到该值时自动写入磁盘
+        """
+        self.root = root
+        self.batch = batch if batch is not None else datetime.now().strftime("%Y%m%d")
+        self.buffer_rows = buffer_rows
+        self.buffers = {table: [] for table in TABLES}
+        self.buffered_rows = 0
+
+    def add_run(self, stock_code: str, trade_log: pl.DataFrame, portfolio_history: pl.DataFrame,
+                metrics: dict, run_id: str | None = None) -> str:
+        """
+        添加一次回测的结果
+
+        Args:
+            stock_code: 股票代码，如 'sh.600000'
+            trade_log: 交易记录DataFrame
+            portfolio_history: 包含每日资产价值的DataFrame
+            metrics: 绩效指标字典，如 {"sharpe_ratio": 1.2}，键必须是 metrics 表中定义的列
+            run_id: 回测标识，默认自动生成
+
+        Returns:
+            str: 回测标识
+        """
+        if run_id is None:
+            run_id = uuid.uuid4().hex[:12]
+
+        tags = [
+            pl.lit(stock_code).alias("symbol"),
+            pl.lit(self.batch).alias("batch"),
+            pl.lit(run_id).alias("run_id")
+        ]
+
+        # 没有交易时交易记录为空DataFrame，无需写入
+        if len(trade_log) > 0:
+            self.buffers["trades"].append(conform_to_schema(trade_log.with_columns(tags), "trades"))
+        self.buffers["equity"].append(conform_to_schema(portfolio_history.with_columns(tags), "equity"))
+        self.buffers["metrics"].append(conform_to_schema(pl.DataFrame([metrics]).with_columns(tags), "metrics"))
+
+        self.buffered_rows += len(trade_log) + len(portfolio_history) + 1
+        if self.buffered_rows >= self.buffer_rows:
+            self.flush()
+
+        return run_id
+
+    def flush(self) -> None:
+        """将缓冲区中的数据写入磁盘"""
+        for table, frames in self.buffers.items():
+            if not frames:
+                continue
+
+            df = pl.concat(frames)
+
+            # 每个分区写入一个新文件，分区列由目录名表示
+            for (symbol, batch), part in df.group_by(list(PARTITION_SCHEMA)):
+                partition_dir = os.path.join(self.root, table, f"symbol={symbol}", f"batch={batch}")
+                os.makedirs(partition_dir, exist_ok=True)
+                part.drop(list(PARTITION_SCHEMA)).write_parquet(
+                    os.path.join(partition_dir, f"part-{uuid.uuid4().hex}.parquet")
+                )
+
+        self.buffers = {table: [] for table in TABLES}
+        self.buffered_rows = 0
+
+    def __enter__(self) -> "ResultExporter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.flush()
+
+
+def scan_results(table: str, root: str = "results") -> pl.LazyFrame:
+    """
+    扫描导出的数据集
+
+    返回LazyFrame，按symbol/batch过滤时只读取对应分区，其余过滤条件和列选择会下推到Parquet读取。
+
+    Args:
+        table: 表名，可选 'trades'、'equity'、'metrics'
+        root: 数据集根目录
+
+    Returns:
+        polars.LazyFrame: 数据集的LazyFrame
+    """
+    if table not in TABLES:
+        raise ValueError(f"未知的表: {table}，可选: {', '.join(TABLES)}")
+
+    return pl.scan_parquet(
+        os.path.join(root, table, "**", "*.parquet"),
+        hive_partitioning=True,
+        hive_schema=PARTITION_SCHEMA
+    )
+
+
+def compact(table: str, root: str = "results") -> None:
+    """
+    合并数据集中的小文件，将每个 symbol/batch 分区重写为单个Parquet文件
+
+    每次运行main.py都会为每个分区写入新文件，多次运行后可调用该函数合并。
+
+    Args:
+        table: 表名，可选 'trades'、'equity'、'metrics'
+        root: 数据集根目录
+    """
+    if table not in TABLES:
+        raise ValueError(f"未知的表: {table}，可选: {', '.join(TABLES)}")
+
+    table_dir = os.path.join(root, table)
+    if not os.path.isdir(table_dir):
+        return
+
+    for partition_dir, _, filenames in os.walk(table_dir):
+        files = sorted(
+            os.path.join(partition_dir, filename)
+            for filename in filenames
+            if filename.endswith(".parquet")
+        )
+        if len(files) <= 1:
+            continue
+
+        # 先写入临时文件再替换，避免合并中断时丢失数据
+        df = pl.concat([
+            conform_to_schema(pl.read_parquet(file), table) for file in files
+        ]).drop(list(PARTITION_SCHEMA))
+        tmp_file = os.path.join(partition_dir, f"part-{uuid.uuid4().hex}.tmp")
+        df.write_parquet(tmp_file)
+        os.replace(tmp_file, f"{tmp_file[:-len('.tmp')]}.parquet")
+        for file in files:
+            os.remove(file)
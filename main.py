@@ -1,5 +1,6 @@
 import backtester as bt
 import data_handler as dh
+import exporter as ex
 import performance as pf
 import strategy as st
 import visualizer as vis
@@ -50,8 +51,18 @@ def main():
     print(f"夏普比率: {sharpe_ratio:.2f}")
     print(f"最大回撤: {max_drawdown:.2%}")
     
-    # 保存交易记录（可选）
-    trade_log.write_csv(f"{stock_code.replace('.', '_')}_trades.csv")
+    # 导出交易记录、每日资产和绩效指标
+    export_dir = cfg["export_dir"]
+    with ex.ResultExporter(export_dir) as exporter:
+        exporter.add_run(stock_code, trade_log, portfolio_history, {
+            "short_window": short_window,
+            "long_window": long_window,
+            "total_return": total_return,
+            "annual_return": annual_return,
+            "sharpe_ratio": sharpe_ratio,
+            "max_drawdown": max_drawdown
+        })
+    print(f"回测结果已导出到 {export_dir}")
     
     # 绘制图表
     print("\n生成图表...")
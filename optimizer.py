@@ -0,0 +1,304 @@
+"""
+参数自适应搜索模块
+
+使用逐次减半（successive halving）搜索均线参数：先在较短的日期区间或部分股票上评估全部候选参数，
+按夏普比率淘汰表现较差的候选，再把剩余的计算量用于幸存者，最后一轮使用全部数据。
+"""
+
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import polars as pl
+
+import backtester as bt
+import config
+import data_handler as dh
+import performance as pf
+import strategy as st
+
+
+def grid_candidates(short_windows: list[int], long_windows: list[int]) -> list[dict]:
+    """
+    生成均线参数网格，只保留短期均线周期小于长期均线周期的组合
+
+    Args:
+        short_windows: 短期均线周期列表
+        long_windows: 长期均线周期列表
+
+    Returns:
+        list[dict]: 候选参数列表
+    """
+    return [
+        {"short_window": short_window, "long_window": long_window}
+        for short_window in short_windows
+        for long_window in long_windows
+        if short_window < long_window
+    ]
+
+def evaluate_candidate(params: dict, stock_data: list[pl.DataFrame], initial_capital: float,
+                       trading_fees: dict | None = None, max_drawdown_limit: float | None = None) -> dict:
+    """
+    在给定数据上评估一组参数
+
+    多只股票时取平均夏普比率和最差的最大回撤。
+
+    Args:
+        params: 候选参数，包含 short_window 和 long_window
+        stock_data: 股票数据DataFrame列表
+        initial_capital: 初始资金
+        trading_fees: 交易费用配置字典
+        max_drawdown_limit: 最大回撤上限，超过上限的参数直接淘汰
+
+    Returns:
+        dict: 评估结果，包含参数、夏普比率、最大回撤、得分和处理的K线数量
+    """
+    sharpe_ratios = []
+    max_drawdowns = []
+    bars = 0
+    for df in stock_data:
+        df_with_signals = st.add_sma_signals(df, params["short_window"], params["long_window"])
+        backtester = bt.SMABacktester(df_with_signals, initial_capital, trading_fees)
+        portfolio_history = backtester.run_backtest()
+        bars += len(df)
+
+        # 数据过短或没有交易时指标可能无法计算，视为最差结果
+        try:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sharpe_ratio = pf.calculate_sharpe_ratio(portfolio_history)
+            max_drawdown = pf.calculate_max_drawdown(portfolio_history)
+        except (ZeroDivisionError, TypeError, IndexError):
+            sharpe_ratio, max_drawdown = -math.inf, 1.0
+        sharpe_ratios.append(sharpe_ratio if math.isfinite(sharpe_ratio) else -math.inf)
+        max_drawdowns.append(max_drawdown)
+
+    sharpe_ratio = float(np.mean(sharpe_ratios))
+    max_drawdown = max(max_drawdowns)
+    score = sharpe_ratio
+    if max_drawdown_limit is not None and max_drawdown > max_drawdown_limit:
+        score = -math.inf
+
+    return {
+        **params,
+        "sharpe_ratio": sharpe_ratio,
+        "max_drawdown": max_drawdown,
+        "score": score,
+        "bars": bars
+    }
+
+# 工作进程中的股票数据及回测参数，由 _init_worker 在每个进程启动时设置一次
+_worker_stock_data: dict[str, pl.DataFrame] = {}
+_worker_backtest_args: dict = {}
+
+
+def _init_worker(stock_data: dict[str, pl.DataFrame], initial_capital: float, trading_fees: dict | None) -> None:
+    """工作进程初始化：保存股票数据，避免每个任务重复传输"""
+    global _worker_stock_data, _worker_backtest_args
+    _worker_stock_data = stock_data
+    _worker_backtest_args = {"initial_capital": initial_capital, "trading_fees": trading_fees}
+
+def _evaluate_slices(params: dict, slices: list[tuple[str, int]], max_drawdown_limit: float | None) -> dict:
+    """在工作进程中按 (股票代码, 行数) 截取最近的数据并评估参数"""
+    stock_data = [_worker_stock_data[stock_code].tail(num_rows) for stock_code, num_rows in slices]
+    return evaluate_candidate(params, stock_data, max_drawdown_limit=max_drawdown_limit, **_worker_backtest_args)
+
+def plan_rungs(stock_data: dict[str, pl.DataFrame], candidates: list[dict], eta: int,
+               resource: str) -> list[list[tuple[str, int]]]:
+    """
+    规划每一轮使用的数据
+
+    数据量没有增加的轮次会被合并；如果逐次减半的计算量不低于完整网格，则只保留使用全部数据的一轮。
+
+    Args:
+        stock_data: 股票代码到股票数据DataFrame的映射
+        candidates: 候选参数列表
+        eta: 每轮淘汰比例的倒数
+        resource: 逐轮增加的资源，'dates' 为日期区间长度，'symbols' 为股票数量
+
+    Returns:
+        list[list[tuple[str, int]]]: 每一轮使用的 (股票代码, 最近行数) 列表
+    """
+    # 轮数为 floor(log_eta(候选数量)) + 1
+    num_rungs = 1
+    while eta ** num_rungs <= len(candidates):
+        num_rungs += 1
+
+    # 股票数量少于轮数时无法逐轮增加股票，改为按日期区间增加
+    if resource == "symbols" and len(stock_data) < num_rungs:
+        print(f"股票数量 {len(stock_data)} 少于轮数 {num_rungs}，改为按日期区间逐轮增加数据")
+        resource = "dates"
+
+    # 日期区间至少要覆盖最长均线周期的两倍，才能产生有效信号
+    min_rows = 2 * max(params["long_window"] for params in candidates)
+    full_slices = [(stock_code, len(df)) for stock_code, df in stock_data.items()]
+
+    rungs = []
+    for rung in range(num_rungs):
+        fraction = eta ** (rung - num_rungs + 1)
+        if resource == "dates":
+            slices = [
+                (stock_code, min(num_rows, max(int(num_rows * fraction), min_rows)))
+                for stock_code, num_rows in full_slices
+            ]
+        else:
+            slices = full_slices[:max(1, math.ceil(len(full_slices) * fraction))]
+
+        # 数据量没有增加的轮次不单独评估
+        if rungs and _count_rows(slices) <= _count_rows(rungs[-1]):
+            continue
+        rungs.append(slices)
+
+    # 计算逐次减半的计算量，不低于完整网格时直接评估完整网格
+    num_candidates = len(candidates)
+    planned_rows = 0
+    for slices in rungs:
+        planned_rows += num_candidates * _count_rows(slices)
+        num_candidates = max(1, num_candidates // eta)
+    if planned_rows >= len(candidates) * _count_rows(full_slices):
+        return [full_slices]
+
+    return rungs
+
+def _count_rows(slices: list[tuple[str, int]]) -> int:
+    """计算一轮使用的K线数量"""
+    return sum(num_rows for _, num_rows in slices)
+
+def successive_halving(stock_data: dict[str, pl.DataFrame], candidates: list[dict], initial_capital: float,
+                       trading_fees: dict | None = None, eta: int = 3, resource: str = "dates",
+                       max_drawdown_limit: float | None = None, max_workers: int | None = None) -> dict:
+    """
+    逐次减半搜索最优参数
+
+    每一轮保留得分最高的 1/eta 候选参数，并把下一轮的数据量扩大 eta 倍，最后一轮使用全部数据。
+
+    Args:
+        stock_data: 股票代码到股票数据DataFrame的映射
+        candidates: 候选参数列表
+        initial_capital: 初始资金
+        trading_fees: 交易费用配置字典
+        eta: 每轮淘汰比例的倒数
+        resource: 逐轮增加的资源，'dates' 为日期区间长度，'symbols' 为股票数量
+        max_drawdown_limit: 最大回撤上限，超过上限的参数直接淘汰
+        max_workers: 并行评估的进程数，默认使用CPU核数
+
+    Returns:
+        dict: 搜索结果，包含最优参数及其评估结果（没有有效参数时为None）、各轮记录和相比完整网格节省的计算量
+    """
+    if not candidates:
+        raise ValueError("候选参数列表为空")
+    if not stock_data:
+        raise ValueError("股票数据为空")
+    if eta < 2:
+        raise ValueError(f"eta 必须不小于2，当前为 {eta}")
+    if resource not in ("dates", "symbols"):
+        raise ValueError(f"未知的资源类型: {resource}，可选: dates, symbols")
+
+    rung_slices = plan_rungs(stock_data, candidates, eta, resource)
+    total_rows = sum(len(df) for df in stock_data.values())
+
+    survivors = candidates
+    rungs = []
+    bars_evaluated = 0
+    # 使用spawn启动工作进程：主进程已使用过polars，fork出的子进程可能死锁
+    # 股票数据通过initializer在每个进程中只传输一次，任务只传递参数和截取范围
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(stock_data, initial_capital, trading_fees)
+    ) as executor:
+        for rung, slices in enumerate(rung_slices):
+            evaluate = partial(_evaluate_slices, slices=slices, max_drawdown_limit=max_drawdown_limit)
+            results = sorted(executor.map(evaluate, survivors), key=lambda result: result["score"], reverse=True)
+            bars_evaluated += sum(result["bars"] for result in results)
+            rows = _count_rows(slices)
+            rungs.append({
+                "rung": rung,
+                "rows": rows,
+                "fraction": rows / total_rows,
+                "candidates": len(survivors),
+                "results": results
+            })
+
+            # 最后一轮不再淘汰
+            if rung < len(rung_slices) - 1:
+                num_keep = max(1, len(survivors) // eta)
+                survivors = [
+                    {"short_window": result["short_window"], "long_window": result["long_window"]}
+                    for result in results[:num_keep]
+                ]
+
+    # 得分均为-inf时（全部超过最大回撤上限或无法计算指标）没有最优参数
+    best = rungs[-1]["results"][0]
+    if not math.isfinite(best["score"]):
+        best = None
+
+    full_grid_bars = len(candidates) * total_rows
+    return {
+        "best": best,
+        "rungs": rungs,
+        "bars_evaluated": bars_evaluated,
+        "full_grid_bars": full_grid_bars,
+        "compute_saved": 1 - bars_evaluated / full_grid_bars
+    }
+
+
+def main():
+    # 加载配置
+    cfg = config.load_config()
+    opt_cfg = cfg["optimization"]
+
+    symbols = opt_cfg["stock_codes"] or [cfg["stock_code"]]
+    start_date = cfg["start_date"]
+    end_date = cfg["end_date"]
+
+    # 获取数据，跳过数据不完整的股票
+    print("获取股票数据...")
+    stock_data = {}
+    for stock_code in symbols:
+        try:
+            stock_data[stock_code] = dh.fetch_stock_data(stock_code, start_date, end_date)
+        except ValueError as e:
+            print(f"跳过 {stock_code}: {e}")
+
+    candidates = grid_candidates(opt_cfg["short_windows"], opt_cfg["long_windows"])
+    print(f"候选参数数量: {len(candidates)}，股票数量: {len(stock_data)}")
+
+    # 执行搜索
+    print("执行逐次减半搜索...")
+    try:
+        result = successive_halving(
+            stock_data,
+            candidates,
+            cfg["initial_capital"],
+            cfg.get("trading_fees", {}),
+            eta=opt_cfg["eta"],
+            resource=opt_cfg["resource"],
+            max_drawdown_limit=opt_cfg["max_drawdown_limit"]
+        )
+    except ValueError as e:
+        print(f"参数搜索失败: {e}")
+        return
+
+    for rung in result["rungs"]:
+        print(f"第 {rung['rung'] + 1} 轮: 候选 {rung['candidates']} 个，"
+              f"使用 {rung['rows']} 根K线（数据比例 {rung['fraction']:.2%}）")
+
+    best = result["best"]
+    print("\n=== 搜索结果 ===")
+    if best is None:
+        if opt_cfg["max_drawdown_limit"] is not None:
+            print(f"没有满足最大回撤上限 {opt_cfg['max_drawdown_limit']:.2%} 的参数")
+        else:
+            print("没有可以有效评估的参数")
+    else:
+        print(f"最优参数: 均线={best['short_window']}/{best['long_window']}")
+        print(f"夏普比率: {best['sharpe_ratio']:.2f}")
+        print(f"最大回撤: {best['max_drawdown']:.2%}")
+    print(f"计算量: {result['bars_evaluated']} / {result['full_grid_bars']} 根K线，"
+          f"相比完整网格节省 {result['compute_saved']:.2%}")
+
+if __name__ == "__main__":
+    main()